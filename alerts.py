@@ -0,0 +1,254 @@
+import bisect
+import json
+import urllib.request
+from collections import deque
+from threading import Thread
+import numpy as np
+
+# Alert rules engine. Rules are compiled once into NumPy arrays so every
+# reading is checked against all rules with a handful of vectorised ops.
+#
+# Rule kinds (all compare a value with `op` against `value`):
+#   threshold - the current reading of `field`
+#   rate      - change of `field` over the last `window` seconds
+#   forecast  - predicted `field` `horizon` seconds ahead
+#   silence   - seconds since the station last sent a reading (dropouts); only
+#               check_silence() fires these, a reading can only clear them
+#
+# Optional keys: `clear` (hysteresis level the value must return past before
+# the alert can fire again, defaults to `value`), `cooldown` (minimum seconds
+# between two firings of the same rule on a station) and `stations` (list of
+# station ids the rule applies to, defaults to all).
+#
+# Forecasts are per station: observe() takes the station's own predictions.
+
+
+def _feature_key(rule, max_horizon=None):
+    if rule.get('op') not in ('<', '>'):
+        raise ValueError(f"Alert rule {rule.get('name')!r}: op must be '<' or '>'")
+    kind = rule['kind']
+    if kind == 'threshold':
+        return ('threshold', rule['field'])
+    if kind == 'rate':
+        return ('rate', rule['field'], float(rule['window']))
+    if kind == 'forecast':
+        horizon = float(rule['horizon'])
+        if horizon <= 0 or (max_horizon is not None and horizon > max_horizon):
+            raise ValueError(f"Alert rule {rule.get('name')!r}: horizon must be between 0 and "
+                             f"{max_horizon} seconds (the prediction horizon)")
+        return ('forecast', rule['field'], horizon)
+    if kind == 'silence':
+        return ('silence',)
+    raise ValueError(f"Unknown alert rule kind {kind!r} in rule {rule.get('name')!r}")
+
+
+class StationAlertState:
+    """Per-station alert state: which rules are active and recent history for rates"""
+
+    def __init__(self, applies, rule_count):
+        self.applies = applies
+        self.active = np.zeros(rule_count, dtype=bool)
+        self.last_fired = np.full(rule_count, -np.inf)
+        self.last_seen = None
+        self.times = deque()
+        self.values = deque()
+
+
+class AlertEngine:
+    def __init__(self, rules, sinks=(), max_horizon=None):
+        """max_horizon: longest forecast horizon (seconds) the predictions cover"""
+        self.rules = list(rules)
+        self.sinks = list(sinks)
+        self.states = {}
+
+        keys = [_feature_key(rule, max_horizon) for rule in self.rules]
+        self.features = list(dict.fromkeys(keys))
+        self.rule_feature = np.array([self.features.index(k) for k in keys], dtype=np.intp)
+
+        self.sign = np.array([1.0 if r['op'] == '>' else -1.0 for r in self.rules])
+        self.threshold = np.array([float(r['value']) for r in self.rules])
+        self.clear = np.array([float(r.get('clear', r['value'])) for r in self.rules])
+        self.cooldown = np.array([float(r.get('cooldown', 0)) for r in self.rules])
+
+        # Station filters: rules without `stations` apply everywhere
+        self.wildcard = np.array(['stations' not in r for r in self.rules], dtype=bool)
+        self.station_rules = {}
+        for i, rule in enumerate(self.rules):
+            for station in rule.get('stations', []):
+                self.station_rules.setdefault(str(station), []).append(i)
+
+        self.rate_fields = sorted({k[1] for k in self.features if k[0] == 'rate'})
+        self.max_window = max([k[2] for k in self.features if k[0] == 'rate'], default=0.0)
+        self.needs_forecast = any(k[0] == 'forecast' for k in self.features)
+        self.silence_feature = self.features.index(('silence',)) if ('silence',) in self.features else None
+        # Stations silent for less than this can't trip any silence rule
+        self.min_silence = min([float(r['value']) for r in self.rules if r['kind'] == 'silence'],
+                               default=None)
+
+    def _state(self, station):
+        state = self.states.get(station)
+        if state is None:
+            applies = self.wildcard.copy()
+            applies[self.station_rules.get(station, [])] = True
+            state = self.states[station] = StationAlertState(applies, len(self.rules))
+        return state
+
+    def _rate(self, state, field, window, now):
+        # Change since the latest reading at or before now - window
+        i = bisect.bisect_right(state.times, now - window) - 1
+        if i < 0:
+            return np.nan
+        column = self.rate_fields.index(field)
+        return state.values[-1][column] - state.values[i][column]
+
+    def observe(self, station, reading, now, forecast=None):
+        """
+        Evaluate all rules for one reading
+        reading: dict of field -> value
+        now: epoch seconds of the reading
+        forecast: optional (target_epochs, {field: predicted values}) from this
+        station's own model, covering at least now + the longest horizon
+        Returns: list of alert events
+        """
+        state = self._state(station)
+        silence = np.nan if state.last_seen is None else now - state.last_seen
+        state.last_seen = now
+
+        if self.rate_fields:
+            state.times.append(now)
+            state.values.append([float(reading.get(f, np.nan)) for f in self.rate_fields])
+            # Keep one reading older than the longest window
+            while len(state.times) > 1 and state.times[1] <= now - self.max_window:
+                state.times.popleft()
+                state.values.popleft()
+
+        values = np.full(len(self.features), np.nan)
+        for i, key in enumerate(self.features):
+            kind = key[0]
+            if kind == 'threshold':
+                values[i] = reading.get(key[1], np.nan)
+            elif kind == 'rate':
+                values[i] = self._rate(state, key[1], key[2], now)
+            elif kind == 'forecast' and forecast is not None:
+                target_epochs, predicted = forecast
+                if key[1] in predicted and len(target_epochs):
+                    # Horizons outside the targets clamp to the nearest prediction
+                    values[i] = np.interp(now + key[2], target_epochs, predicted[key[1]])
+            elif kind == 'silence':
+                values[i] = silence
+
+        # The station just reported, so it isn't silent: its silence rules may clear, not fire
+        fire_values = values.copy()
+        if self.silence_feature is not None:
+            fire_values[self.silence_feature] = np.nan
+        return self._evaluate(station, state, values, now, fire_values)
+
+    def check_silence(self, now, last_seen):
+        """
+        Evaluate silence rules, e.g. from a periodic timer
+        last_seen: (station, epoch seconds of its last reading) pairs, from the
+        station registry so stations whose history is spilled are included
+        """
+        if self.silence_feature is None:
+            return []
+        events = []
+        for station, seen in last_seen:
+            # Other features are NaN, which leaves their rules untouched
+            values = np.full(len(self.features), np.nan)
+            values[self.silence_feature] = now - seen
+            events += self._evaluate(station, self._state(station), values, now)
+        return events
+
+    def forget(self, station):
+        """Drop all state for a station"""
+        self.states.pop(station, None)
+
+    def detach_history(self, station):
+        """
+        Remove and return a station's rate history, e.g. to persist it elsewhere
+        The small per-rule state (active, last fired) stays so silence rules
+        keep working while the station is spilled.
+        """
+        state = self.states.get(station)
+        if state is None:
+            return None
+        history = (state.times, state.values)
+        state.times, state.values = deque(), deque()
+        return history
+
+    def attach_history(self, station, history):
+        """Restore history previously returned by detach_history()"""
+        if history is not None:
+            state = self._state(station)
+            state.times, state.values = history
+
+    def _evaluate(self, station, state, features, now, fire_features=None):
+        """fire_features: values checked for firing, if they differ from features"""
+        x = features[self.rule_feature]
+        x_fire = x if fire_features is None else fire_features[self.rule_feature]
+        # NaN (feature unavailable) compares False on both sides: no change
+        over = self.sign * (x_fire - self.threshold) > 0
+        safe = self.sign * (x - self.clear) <= 0
+
+        fire = over & state.applies & ~state.active & (now - state.last_fired >= self.cooldown)
+        cleared = safe & state.active
+        state.active = (state.active | fire) & ~cleared
+        state.last_fired[fire] = now
+
+        if not fire.any() and not cleared.any():
+            return []
+
+        events = []
+        for i in np.flatnonzero(fire | cleared):
+            rule = self.rules[i]
+            events.append({
+                'time': now,
+                'station': station,
+                'rule': rule['name'],
+                'state': 'fired' if fire[i] else 'cleared',
+                'kind': rule['kind'],
+                'field': rule.get('field'),
+                'value': float(x[i]),
+                'op': rule['op'],
+                'threshold': float(self.threshold[i])
+            })
+        self.emit(events)
+        return events
+
+    def emit(self, events):
+        for sink in self.sinks:
+            try:
+                sink(events)
+            except Exception as e:
+                print(f"❌ Alert sink error: {e}")
+
+
+class FileSink:
+    """Append alert events to a JSON lines file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self, events):
+        with open(self.path, 'a') as f:
+            for event in events:
+                f.write(json.dumps(event) + '\n')
+
+
+class WebhookSink:
+    """POST alert events as JSON to a (local) webhook without blocking ingest"""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, events):
+        Thread(target=self._post, args=(events,), daemon=True).start()
+
+    def _post(self, events):
+        body = json.dumps({'alerts': events}).encode('utf-8')
+        req = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        try:
+            urllib.request.urlopen(req, timeout=self.timeout).close()
+        except Exception as e:
+            print(f"❌ Webhook Error: {e}")
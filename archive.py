@@ -0,0 +1,233 @@
+import os
+import struct
+import zlib
+import numpy as np
+
+# Cold-data archive: readings are stored column-wise in compressed chunks.
+# Timestamps use delta-of-delta encoding, sensor values are either quantised
+# deltas (lossy to the given resolution) or XOR of consecutive float bits
+# (lossless). Each chunk holds the readings of one station and starts with a
+# header holding the station id, time range and per-column min/max so range
+# queries can skip chunks without decoding them.
+
+ARCHIVE_FILE = 'weather_archive.bin'
+ARCHIVE_COLUMNS = ['temperature', 'pressure', 'humidity', 'altitude', 'light']
+CHUNK_ROWS = 720  # 1 hour at 5 sec intervals
+
+# Values per unit kept when quantising; None means lossless XOR encoding
+COLUMN_SCALES = {
+    'temperature': 100,
+    'pressure': 100,
+    'humidity': 100,
+    'altitude': 100,
+    'light': 100,
+}
+
+MAGIC = b'WXC2'
+MODE_QUANTISED = 0
+MODE_XOR = 1
+# Largest |value * scale| quantised; beyond 2**53 float64 can't hold every integer
+MAX_QUANTISED = 2 ** 53
+
+# magic, rows, t_min (ms), t_max (ms), station id bytes, payload bytes;
+# followed by the UTF-8 station id, then the payload
+CHUNK_HEADER = struct.Struct('<4sIqqHI')
+# timestamp blob: int width, blob bytes
+TIME_HEADER = struct.Struct('<BI')
+# per column: min, max, mode, scale, int width, blob bytes
+COLUMN_HEADER = struct.Struct('<ddBdBI')
+
+
+def _narrow(values):
+    """Cast an int64 array to the smallest signed int type that holds it"""
+    if len(values) == 0:
+        return values.astype('<i1')
+    lo, hi = values.min(), values.max()
+    for width in (1, 2, 4):
+        info = np.iinfo(f'i{width}')
+        if info.min <= lo and hi <= info.max:
+            return values.astype(f'<i{width}')
+    return values.astype('<i8')
+
+
+def _encode_times(ts_ms):
+    deltas = np.diff(ts_ms, prepend=ts_ms[0])
+    dod = _narrow(np.diff(deltas, prepend=0))
+    return dod.itemsize, zlib.compress(dod.tobytes())
+
+
+def _decode_times(blob, width, t0):
+    dod = np.frombuffer(zlib.decompress(blob), dtype=f'<i{width}').astype(np.int64)
+    return t0 + np.cumsum(np.cumsum(dod))
+
+
+def _encode_values(values, scale):
+    # Quantising can't represent NaN (missing readings), inf or values that overflow
+    # int64; XOR keeps them bit-exact
+    if (scale is None or not np.isfinite(values).all()
+            or (len(values) and np.abs(values).max() * scale >= MAX_QUANTISED)):
+        bits = values.astype('<f8').view('<u8')
+        xored = bits.copy()
+        xored[1:] = bits[1:] ^ bits[:-1]
+        return MODE_XOR, 0.0, 8, zlib.compress(xored.tobytes())
+
+    quantised = np.round(values * scale).astype(np.int64)
+    deltas = _narrow(np.diff(quantised, prepend=0))
+    return MODE_QUANTISED, float(scale), deltas.itemsize, zlib.compress(deltas.tobytes())
+
+
+def _decode_values(blob, mode, scale, width):
+    raw = zlib.decompress(blob)
+    if mode == MODE_XOR:
+        xored = np.frombuffer(raw, dtype='<u8')
+        return np.bitwise_xor.accumulate(xored).view('<f8')
+    deltas = np.frombuffer(raw, dtype=f'<i{width}').astype(np.int64)
+    return np.cumsum(deltas) / scale
+
+
+def to_epoch_ms(timestamps):
+    """Convert ISO timestamp strings (or datetime64 values) to int64 epoch ms"""
+    return np.asarray(timestamps, dtype='datetime64[us]').astype('datetime64[ms]').astype(np.int64)
+
+
+def encode_chunk(ts_ms, columns, station=''):
+    """
+    Encode one chunk of readings
+    ts_ms: int64 array of epoch milliseconds, sorted ascending
+    columns: dict of column name -> float array, same length as ts_ms (NaN = missing)
+    station: id of the station all readings come from
+    Returns: bytes (header + station id + payload)
+    """
+    ts_ms = np.asarray(ts_ms, dtype=np.int64)
+    width, time_blob = _encode_times(ts_ms)
+
+    payload = [TIME_HEADER.pack(width, len(time_blob)), time_blob]
+    for name in ARCHIVE_COLUMNS:
+        values = np.asarray(columns[name], dtype=np.float64)
+        mode, scale, width, blob = _encode_values(values, COLUMN_SCALES.get(name))
+        # Min/max ignore missing values; an all-missing column gets NaN bounds
+        valid = values[~np.isnan(values)]
+        lo, hi = (valid.min(), valid.max()) if len(valid) else (np.nan, np.nan)
+        payload.append(COLUMN_HEADER.pack(lo, hi, mode, scale, width, len(blob)))
+        payload.append(blob)
+
+    payload = b''.join(payload)
+    station_id = station.encode('utf-8')
+    header = CHUNK_HEADER.pack(MAGIC, len(ts_ms), int(ts_ms[0]), int(ts_ms[-1]),
+                               len(station_id), len(payload))
+    return header + station_id + payload
+
+
+def decode_chunk(payload, rows, t_min, wanted=None):
+    """
+    Decode a chunk payload straight into NumPy arrays
+    Returns: dict with 'timestamp' (datetime64[ms]) and the wanted columns
+    """
+    offset = 0
+    width, length = TIME_HEADER.unpack_from(payload, offset)
+    offset += TIME_HEADER.size
+    ts_ms = _decode_times(payload[offset:offset + length], width, t_min)
+    offset += length
+
+    result = {'timestamp': ts_ms.astype('datetime64[ms]')}
+    for name in ARCHIVE_COLUMNS:
+        _, _, mode, scale, width, length = COLUMN_HEADER.unpack_from(payload, offset)
+        offset += COLUMN_HEADER.size
+        if wanted is None or name in wanted:
+            result[name] = _decode_values(payload[offset:offset + length], mode, scale, width)
+        offset += length
+
+    if len(ts_ms) != rows:
+        raise ValueError(f"Corrupt archive chunk: expected {rows} rows, got {len(ts_ms)}")
+    return result
+
+
+def append_chunks(ts_ms, columns, path=ARCHIVE_FILE, stations=None):
+    """
+    Split readings into per-station, CHUNK_ROWS sized chunks and append them to the archive
+    stations: station id of each reading (default: all from station '')
+    """
+    ts_ms = np.asarray(ts_ms, dtype=np.int64)
+    stations = np.full(len(ts_ms), '', dtype=object) if stations is None else np.asarray(stations, dtype=object)
+    columns = {name: np.asarray(columns[name], dtype=np.float64) for name in ARCHIVE_COLUMNS}
+
+    chunks = 0
+    with open(path, 'ab') as f:
+        for station in dict.fromkeys(stations):
+            rows = np.flatnonzero(stations == station)
+            rows = rows[np.argsort(ts_ms[rows], kind='stable')]
+            for start in range(0, len(rows), CHUNK_ROWS):
+                part = rows[start:start + CHUNK_ROWS]
+                f.write(encode_chunk(ts_ms[part], {name: values[part] for name, values in columns.items()},
+                                     station))
+                chunks += 1
+    return chunks
+
+
+def iter_headers(f):
+    """Yield (rows, t_min, t_max, station, payload_offset, payload_len) without reading payloads"""
+    while True:
+        raw = f.read(CHUNK_HEADER.size)
+        if len(raw) < CHUNK_HEADER.size:
+            return
+        magic, rows, t_min, t_max, station_len, length = CHUNK_HEADER.unpack(raw)
+        if magic != MAGIC:
+            raise ValueError(f"Bad archive chunk at offset {f.tell() - CHUNK_HEADER.size}")
+        station = f.read(station_len).decode('utf-8')
+        offset = f.tell()
+        yield rows, t_min, t_max, station, offset, length
+        f.seek(offset + length)
+
+
+def read_range(start=None, end=None, columns=None, path=ARCHIVE_FILE, limit=None, station=None):
+    """
+    Read archived readings with start <= timestamp <= end, oldest first
+    start/end: anything np.datetime64 accepts (ISO string, datetime) or None
+    limit: return at most this many rows, the oldest ones
+    station: only this station's readings (default: all stations)
+    Only chunks overlapping the range (and station) are read and decoded; once
+    limit rows are found, chunks starting after the newest of them are skipped.
+    Returns: dict of NumPy arrays keyed by 'timestamp', 'station' and column name
+    """
+    wanted = ARCHIVE_COLUMNS if columns is None else [c for c in ARCHIVE_COLUMNS if c in columns]
+    lo = None if start is None else int(to_epoch_ms([start])[0])
+    hi = None if end is None else int(to_epoch_ms([end])[0])
+
+    parts = []
+    found = 0
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            for rows, t_min, t_max, chunk_station, offset, length in iter_headers(f):
+                if (lo is not None and t_max < lo) or (hi is not None and t_min > hi):
+                    continue
+                if station is not None and chunk_station != station:
+                    continue
+                f.seek(offset)
+                chunk = decode_chunk(f.read(length), rows, t_min, wanted)
+                chunk['station'] = np.full(rows, chunk_station, dtype=object)
+
+                ts_ms = chunk['timestamp'].astype(np.int64)
+                mask = np.ones(len(ts_ms), dtype=bool)
+                if lo is not None:
+                    mask &= ts_ms >= lo
+                if hi is not None:
+                    mask &= ts_ms <= hi
+                parts.append({key: values[mask] for key, values in chunk.items()})
+                found += int(mask.sum())
+
+                # Chunks of different stations overlap in time: keep reading those that
+                # may hold rows older than the limit-th oldest found so far
+                if limit is not None and found >= limit:
+                    found_ms = np.concatenate([p['timestamp'] for p in parts]).astype(np.int64)
+                    newest = int(np.partition(found_ms, limit - 1)[limit - 1])
+                    hi = newest if hi is None else min(hi, newest)
+
+    result = {'timestamp': np.empty(0, dtype='datetime64[ms]'), 'station': np.empty(0, dtype=object)}
+    result.update({name: np.empty(0) for name in wanted})
+    if not parts:
+        return result
+
+    for key in result:
+        result[key] = np.concatenate([p[key] for p in parts])
+    order = np.argsort(result['timestamp'], kind='stable')[:limit]
+    return {key: values[order] for key, values in result.items()}
@@ -0,0 +1,18 @@
+import server
+from conftest import make_reading
+
+
+def bench_save_to_csv(benchmark):
+    benchmark(server.save_to_csv, 'bench', make_reading())
+
+
+def bench_get_data(benchmark, window):
+    benchmark(server.get_data)
+
+
+def bench_get_history(benchmark, window):
+    benchmark(server.get_history)
+
+
+def bench_get_history_binary(benchmark, window):
+    benchmark(server.get_history_binary)
@@ -0,0 +1,16 @@
+import server
+
+
+def bench_fit_model(benchmark, window):
+    history, _ = window
+    benchmark(server.fit_model, history)
+
+
+def bench_predict_future(benchmark, window):
+    _, state = window
+    benchmark(server.predict_future, state)
+
+
+def bench_compute_forecast(benchmark, window):
+    _, state = window
+    benchmark(server.compute_forecast, state)
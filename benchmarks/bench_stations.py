@@ -0,0 +1,86 @@
+import numpy as np
+import server
+from alerts import AlertEngine
+from stations import StationRegistry
+from conftest import make_reading, time_now
+
+
+def make_registry(engine, spill_dir, now):
+    return StationRegistry(
+        idle_timeout=server.STATION_IDLE_TIMEOUT,
+        expire_after=server.STATION_EXPIRY,
+        max_resident=server.MAX_RESIDENT_STATIONS,
+        spill_dir=str(spill_dir),
+        buffer_size=server.STATION_BUFFER_SIZE,
+        on_spill=engine.detach_history,
+        on_restore=engine.attach_history,
+        now=now
+    )
+
+
+def bench_ingest(benchmark, stations, tmp_path):
+    # Registry touch + per-station buffer + alert rules, round-robin over stations
+    engine = AlertEngine(server.DEFAULT_ALERT_RULES)
+    now = time_now()
+    registry = make_registry(engine, tmp_path, now)
+    reading = make_reading()
+    clock = {'i': 0, 'now': now}
+
+    def ingest():
+        station = stations[clock['i'] % len(stations)]
+        clock['i'] += 1
+        clock['now'] += 5.0 / len(stations)
+        record = registry.touch(station, clock['now'])
+        record.buffer.append(reading, clock['now'])
+        engine.observe(station, reading, clock['now'])
+
+    benchmark(ingest)
+
+
+def bench_alert_observe_many_rules(benchmark, stations):
+    # 1000 threshold/rate rules spread over the fields, one reading per call
+    rng = np.random.default_rng(0)
+    fields = ['temperature', 'pressure', 'humidity', 'altitude', 'light']
+    rules = []
+    for i in range(1000):
+        rule = {'name': f"rule-{i}", 'field': fields[i % 5], 'op': '<' if i % 2 else '>',
+                'value': float(rng.normal(0, 50))}
+        if i % 4 == 0:
+            rule.update(kind='rate', window=600 * (1 + i % 3))
+        else:
+            rule['kind'] = 'threshold'
+        rules.append(rule)
+    engine = AlertEngine(rules)
+    reading = make_reading()
+    clock = {'i': 0, 'now': time_now()}
+
+    def observe():
+        clock['i'] += 1
+        clock['now'] += 5.0 / len(stations)
+        engine.observe(stations[clock['i'] % len(stations)], reading, clock['now'])
+
+    benchmark(observe)
+
+
+def bench_get_stations(benchmark, stations, tmp_path, monkeypatch):
+    now = time_now()
+    registry = make_registry(AlertEngine([]), tmp_path, now)
+    for i, station in enumerate(stations):
+        registry.touch(station, now - i)
+    monkeypatch.setattr(server, 'station_registry', registry)
+
+    with server.app.test_request_context('/api/stations'):
+        benchmark(server.get_stations)
+
+
+def bench_station_tick(benchmark, stations, tmp_path):
+    registry = make_registry(AlertEngine([]), tmp_path, time_now())
+    for station in stations:
+        registry.touch(station, time_now())
+    clock = {'now': time_now()}
+
+    def tick():
+        clock['now'] += 1.0
+        registry.tick(clock['now'])
+
+    benchmark(tick)
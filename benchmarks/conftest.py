@@ -0,0 +1,83 @@
+import os
+import sys
+from datetime import datetime
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+from timeseries import TimeRingBuffer
+
+# Sizes can be narrowed for quick runs, e.g. BENCH_WINDOWS=100,10000
+def _sizes(name, default):
+    return [int(n) for n in os.environ.get(name, default).split(',')]
+
+WINDOW_SIZES = _sizes('BENCH_WINDOWS', '100,10000,1000000')
+STATION_COUNTS = _sizes('BENCH_STATIONS', '10,1000,10000')
+
+_histories = {}
+
+
+def make_reading(rng=None, t=None):
+    rng = rng or np.random.default_rng(0)
+    t = time_now() if t is None else t
+    return {
+        'temperature': 22 + rng.normal(0, 1),
+        'pressure': 1013 + rng.normal(0, 1),
+        'humidity': 55 + rng.normal(0, 5),
+        'altitude': 40 + rng.normal(0, 0.5),
+        'light': 60 + rng.normal(0, 10),
+        'received_at': datetime.fromtimestamp(t).isoformat()
+    }
+
+
+def time_now():
+    return datetime.now().timestamp()
+
+
+def make_history(size, interval=5.0, seed=0):
+    """Synthetic readings every ~5 s ending now, with slow random-walk trends"""
+    if size in _histories:
+        return _histories[size]
+
+    rng = np.random.default_rng(seed)
+    times = np.sort(time_now() - (size - np.arange(size)) * interval + rng.normal(0, 0.2, size))
+    walk = np.cumsum(rng.normal(0, 0.01, (size, 5)), axis=0)
+    values = walk + np.array([22, 1013, 55, 40, 60])
+
+    history = TimeRingBuffer(maxlen=size)
+    for t, (temp, pressure, humidity, altitude, light) in zip(times.tolist(), values.tolist()):
+        history.append({
+            'temperature': temp,
+            'pressure': pressure,
+            'humidity': humidity,
+            'altitude': altitude,
+            'light': light,
+            'received_at': datetime.fromtimestamp(t).isoformat()
+        }, t)
+    _histories[size] = history
+    return history
+
+
+@pytest.fixture(autouse=True)
+def isolated_files(tmp_path, monkeypatch):
+    # Keep benchmark writes out of the real CSV logs
+    monkeypatch.setattr(server, 'CSV_FILE', str(tmp_path / 'weather_data.csv'))
+    monkeypatch.setattr(server, 'PREDICTION_CSV_FILE', str(tmp_path / 'weather_predictions.csv'))
+    monkeypatch.setattr(server, 'prediction_history', [])
+    server.init_csv()
+
+
+@pytest.fixture(params=WINDOW_SIZES, ids=lambda n: f"window={n}")
+def window(request, monkeypatch):
+    """A station history of the given size and its trained model, behind the dashboard endpoints"""
+    history = make_history(request.param)
+    state = server.fit_model(history)
+    monkeypatch.setattr(server, 'dashboard_source', lambda: ('bench', history, state))
+    return history, state
+
+
+@pytest.fixture(params=STATION_COUNTS, ids=lambda n: f"stations={n}")
+def stations(request):
+    return [f"station-{i}" for i in range(request.param)]
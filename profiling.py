@@ -0,0 +1,94 @@
+import cProfile
+import os
+import sys
+import time
+import traceback
+from collections import Counter
+from threading import Thread, Event, Lock
+
+# Opt-in profiling of the live server. The sampling profiler snapshots every
+# thread's stack at a fixed interval and writes collapsed stacks (one
+# "frame;frame;frame count" line per stack, the input format of flamegraph
+# tools). cProfile is deterministic but per-thread, so it is run on the
+# websocket event loop where ingest, training and alerting happen.
+
+PROFILE_DIR = 'profiles'
+
+# Held while a cProfile run is active; only one can profile the loop at a time
+_event_loop_run = Lock()
+
+
+def _profile_path(prefix, ext):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    return os.path.join(PROFILE_DIR, f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}.{ext}")
+
+
+class SamplingProfiler:
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = Event()
+        self._thread = None
+        self._lock = Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return False
+            self.samples.clear()
+            self._stop.clear()
+            self._thread = Thread(target=self._run, daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        """Stop sampling and write collapsed stacks. Returns: path of the dump"""
+        with self._lock:
+            if not self.running:
+                return None
+            self._stop.set()
+            self._thread.join()
+            path = _profile_path('sample', 'txt')
+            with open(path, 'w') as f:
+                for stack, count in self.samples.most_common():
+                    f.write(f"{stack} {count}\n")
+            return path
+
+    def _run(self):
+        own_id = self._thread.ident
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = ';'.join(f"{f.name} ({os.path.basename(f.filename)}:{f.lineno})"
+                                 for f in traceback.extract_stack(frame))
+                self.samples[stack] += 1
+
+
+def profile_event_loop(loop, seconds):
+    """
+    Run cProfile on `loop`'s thread for `seconds`, then dump it
+    Returns immediately; the .prof file (readable with pstats or snakeviz)
+    is written to PROFILE_DIR when the run finishes.
+    Returns: False if a run is already active
+    """
+    if not _event_loop_run.acquire(blocking=False):
+        return False
+    profiler = cProfile.Profile()
+
+    def finish():
+        try:
+            profiler.disable()
+            path = _profile_path('cprofile', 'prof')
+            profiler.dump_stats(path)
+            print(f"📈 cProfile written to {path}")
+        finally:
+            _event_loop_run.release()
+
+    loop.call_soon_threadsafe(profiler.enable)
+    loop.call_soon_threadsafe(loop.call_later, seconds, finish)
+    return True
@@ -3,40 +3,124 @@ import websockets
 import json
 import csv
 import os
+import gzip
+import hashlib
+import mimetypes
+import shutil
+import signal
+import struct
 from datetime import datetime, timedelta
-from flask import Flask, render_template_string
-from threading import Thread
+import time
+from flask import Flask, Response, request
+from threading import Thread, Lock, Timer
 import numpy as np
 from sklearn.linear_model import LinearRegression
-from collections import deque
+import archive
+from timeseries import find_gaps, resample
+from alerts import AlertEngine, FileSink, WebhookSink
+from stations import StationRegistry, STATUS_LIVE, STATUS_STALE
+from profiling import SamplingProfiler, profile_event_loop, PROFILE_DIR
 
-# Data storage
-data_history = deque(maxlen=100)
+try:
+    import brotli
+except ImportError:
+    brotli = None  # Brotli is optional, gzip is always available
+
+# Data storage: readings and models are kept per station in station_registry
 prediction_history = []  # Store all predictions
-ml_model = LinearRegression()
+MODEL_FIELDS = ['temperature', 'pressure', 'humidity', 'altitude']  # Model output columns
+
+# Time indexing: the model is fitted on a fixed wall-clock grid, not sample numbers
+SAMPLE_INTERVAL = 5  # seconds between grid points (ESP32 send interval)
+MAX_GAP = 3 * SAMPLE_INTERVAL  # don't interpolate across longer dropouts...
+GAP_FACTOR = 3  # ...or across more than 3 of the station's send intervals, whichever is longer
+TRAINING_WINDOW = timedelta(minutes=8)  # wall-clock span of readings the model is fitted on
+PREDICTION_HORIZON = timedelta(minutes=5)
+PREDICTION_STEP = timedelta(seconds=5)
+WARMUP = timedelta(minutes=3)  # wall-clock data on the grid needed before predicting
+MIN_GRID_POINTS = int(WARMUP.total_seconds() // SAMPLE_INTERVAL)
+
+# A station's model state is (model, time origin in epoch seconds, seconds of data
+# covered by the grid). It is replaced as a whole so Flask threads never pair new
+# coefficients with an old origin.
+NO_MODEL = (None, None, 0.0)
 
 # CSV file setup
 CSV_FILE = 'weather_data.csv'
 PREDICTION_CSV_FILE = 'weather_predictions.csv'
-CSV_HEADERS = ['timestamp', 'temperature', 'pressure', 'humidity', 'altitude', 'light']
+CSV_HEADERS = ['timestamp', 'station', 'temperature', 'pressure', 'humidity', 'altitude', 'light']
 PRED_CSV_HEADERS = ['prediction_time', 'target_time', 'temperature', 'pressure', 'humidity', 'altitude']
+csv_lock = Lock()  # Guards CSV_FILE between the websocket writer and the archiver
+
+# Alert rules: alert_rules.json (a JSON list of rules, see alerts.py) overrides the defaults
+ALERT_RULES_FILE = 'alert_rules.json'
+ALERT_LOG_FILE = 'weather_alerts.jsonl'
+ALERT_WEBHOOK_URL = os.environ.get('ALERT_WEBHOOK_URL')  # e.g. http://localhost:9000/alerts
+ALERT_SWEEP_INTERVAL = 10  # seconds between checks for silent stations
+DEFAULT_ALERT_RULES = [
+    {'name': 'freezing', 'kind': 'threshold', 'field': 'temperature', 'op': '<', 'value': 0,
+     'clear': 1, 'cooldown': 600},
+    {'name': 'freezing_forecast', 'kind': 'forecast', 'field': 'temperature', 'horizon': 300,
+     'op': '<', 'value': 0, 'clear': 1, 'cooldown': 600},
+    {'name': 'storm_onset', 'kind': 'rate', 'field': 'pressure', 'window': 10800,
+     'op': '<', 'value': -3, 'clear': -1, 'cooldown': 3600},
+    {'name': 'sensor_dropout', 'kind': 'silence', 'op': '>', 'value': 60, 'clear': 30}
+]
+
+# Station lifecycle: stale after STATION_IDLE_TIMEOUT without readings, state dropped
+# after STATION_EXPIRY; only MAX_RESIDENT_STATIONS keep their buffers in memory
+STATION_IDLE_TIMEOUT = 60  # seconds
+STATION_EXPIRY = 24 * 3600  # seconds
+STATION_BUFFER_SIZE = 480  # readings kept per station, covers TRAINING_WINDOW at one reading a second
+MAX_RESIDENT_STATIONS = 1000
+STATION_SPILL_DIR = 'station_state'
+STATION_TICK_INTERVAL = 1  # seconds between timer wheel ticks
+
+# Profiling: /api/profile is only served when WEATHER_PROFILING=1; SIGUSR1 toggles
+# the sampling profiler and SIGUSR2 runs cProfile on the websocket loop
+PROFILING_ENABLED = os.environ.get('WEATHER_PROFILING') == '1'
+PROFILE_SIGNAL_SECONDS = 30
+MAX_PROFILE_SECONDS = 300
+sampling_profiler = SamplingProfiler()
+ws_loop = None  # Websocket event loop, set by start_websocket()
+
+# Archive settings: readings older than ARCHIVE_AFTER move from CSV to the archive
+ARCHIVE_AFTER = timedelta(hours=24)
+ARCHIVE_INTERVAL = 3600  # seconds between rotations
+ARCHIVE_MAX_ROWS = 100000  # cap on rows returned by /api/archive
 
 def init_csv():
     if not os.path.exists(CSV_FILE):
         with open(CSV_FILE, 'w', newline='') as f:
             writer = csv.DictWriter(f, fieldnames=CSV_HEADERS)
             writer.writeheader()
+    else:
+        upgrade_csv()
     
     if not os.path.exists(PREDICTION_CSV_FILE):
         with open(PREDICTION_CSV_FILE, 'w', newline='') as f:
             writer = csv.DictWriter(f, fieldnames=PRED_CSV_HEADERS)
             writer.writeheader()
 
-def save_to_csv(data):
-    with open(CSV_FILE, 'a', newline='') as f:
+def upgrade_csv():
+    # Files written before the station column get it added, left empty
+    with open(CSV_FILE, newline='') as f:
+        if next(csv.reader(f), None) == CSV_HEADERS:
+            return
+    tmp_file = CSV_FILE + '.tmp'
+    with open(CSV_FILE, newline='') as src, open(tmp_file, 'w', newline='') as dst:
+        writer = csv.DictWriter(dst, fieldnames=CSV_HEADERS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(csv.DictReader(src))
+    os.replace(tmp_file, CSV_FILE)
+    print(f"💾 Added the station column to {CSV_FILE}")
+
+def save_to_csv(station, data):
+    with csv_lock, open(CSV_FILE, 'a', newline='') as f:
         writer = csv.DictWriter(f, fieldnames=CSV_HEADERS)
         writer.writerow({
             'timestamp': data['received_at'],
+            'station': station,
             'temperature': data['temperature'],
             'pressure': data['pressure'],
             'humidity': data.get('humidity', 0),
@@ -50,7 +134,130 @@ def save_predictions_to_csv(predictions_data):
         for pred in predictions_data:
             writer.writerow(pred)
 
-app = Flask(__name__)
+def load_alert_rules():
+    if os.path.exists(ALERT_RULES_FILE):
+        with open(ALERT_RULES_FILE) as f:
+            return json.load(f)
+    return DEFAULT_ALERT_RULES
+
+def create_alert_engine():
+    sinks = [FileSink(ALERT_LOG_FILE)]
+    if ALERT_WEBHOOK_URL:
+        sinks.append(WebhookSink(ALERT_WEBHOOK_URL))
+    return AlertEngine(load_alert_rules(), sinks, max_horizon=PREDICTION_HORIZON.total_seconds())
+
+alert_engine = create_alert_engine()
+
+def close_idle_connections(record):
+    # Runs on the websocket event loop from station_sweep()
+    print(f"💤 Station {record.station} idle for {STATION_IDLE_TIMEOUT}s")
+    for connection in list(record.connections):
+        asyncio.ensure_future(connection.close(1001, 'idle timeout'))
+
+def expire_station(station):
+    alert_engine.forget(station)
+    print(f"🗑️ Station {station} expired")
+
+station_registry = StationRegistry(
+    idle_timeout=STATION_IDLE_TIMEOUT,
+    expire_after=STATION_EXPIRY,
+    max_resident=MAX_RESIDENT_STATIONS,
+    spill_dir=STATION_SPILL_DIR,
+    buffer_size=STATION_BUFFER_SIZE,
+    on_spill=alert_engine.detach_history,
+    on_restore=alert_engine.attach_history,
+    on_idle=close_idle_connections,
+    on_expire=expire_station,
+    now=time.time()
+)
+
+def parse_csv_value(value):
+    # Missing readings (e.g. "temperature": null) are stored as empty cells
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+def archive_rows(rows):
+    archive.append_chunks(
+        archive.to_epoch_ms([r['timestamp'] for r in rows]),
+        {name: [parse_csv_value(r[name]) for r in rows] for name in archive.ARCHIVE_COLUMNS},
+        stations=[r.get('station') or '' for r in rows]
+    )
+
+def archive_old_data(older_than=ARCHIVE_AFTER):
+    """
+    Move readings older than `older_than` from CSV_FILE into the compressed archive
+    csv_lock is only held to swap files: ingest appends to a fresh CSV_FILE while
+    the rotated one is streamed into the archive.
+    Returns: number of rows archived
+    """
+    cutoff = (datetime.now() - older_than).isoformat()
+    rotated_file = CSV_FILE + '.rotated'
+    hot_file = CSV_FILE + '.tmp'
+    
+    with csv_lock:
+        # A segment left by an interrupted rotation is finished before rotating again
+        if not os.path.exists(rotated_file):
+            if not os.path.exists(CSV_FILE):
+                return 0
+            with open(CSV_FILE, newline='') as f:
+                oldest = next(csv.DictReader(f), None)
+            # ISO timestamps from the same clock compare correctly as strings
+            if oldest is None or oldest['timestamp'] >= cutoff:
+                return 0
+            os.replace(CSV_FILE, rotated_file)
+            with open(CSV_FILE, 'w', newline='') as f:
+                csv.DictWriter(f, fieldnames=CSV_HEADERS).writeheader()
+    
+    # Stream the rotated segment: cold rows go to the archive a chunk per station
+    # at a time, hot rows to the file that replaces CSV_FILE
+    archived = 0
+    cold = {}  # station -> rows not yet archived
+    with open(rotated_file, newline='') as src, open(hot_file, 'w', newline='') as dst:
+        writer = csv.DictWriter(dst, fieldnames=CSV_HEADERS)
+        writer.writeheader()
+        for row in csv.DictReader(src):
+            if row['timestamp'] >= cutoff:
+                writer.writerow(row)
+                continue
+            rows = cold.setdefault(row.get('station') or '', [])
+            rows.append(row)
+            if len(rows) == archive.CHUNK_ROWS:
+                archive_rows(rows)
+                archived += len(rows)
+                rows.clear()
+        for rows in cold.values():
+            if rows:
+                archive_rows(rows)
+                archived += len(rows)
+    
+    with csv_lock:
+        # Readings that arrived during the rotation follow the hot ones
+        if os.path.exists(CSV_FILE):
+            with open(CSV_FILE, newline='') as src, open(hot_file, 'a', newline='') as dst:
+                src.readline()  # header
+                shutil.copyfileobj(src, dst)
+        os.replace(hot_file, CSV_FILE)
+        os.remove(rotated_file)
+    
+    print(f"🗄️ Archived {archived} readings older than {cutoff}")
+    return archived
+
+def start_archiver():
+    while True:
+        try:
+            archive_old_data()
+        except Exception as e:
+            print(f"❌ Archive Error: {e}")
+        time.sleep(ARCHIVE_INTERVAL)
+
+# Flask's own static route is disabled; assets are served precompressed below
+app = Flask(__name__, static_folder=None)
+
+# Static assets: vendored Chart.js lives in static/ so air-gapped sites work
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+CHART_JS_FILE = 'chart.min.js'  # Chart.js v4.4.0 UMD build, MIT licensed
 
 # Professional Dashboard HTML
 DASHBOARD_HTML = """
@@ -226,10 +433,16 @@ DASHBOARD_HTML = """
             .header h1 { font-size: 24px; }
         }
     </style>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/Chart.js/3.9.1/chart.min.js"></script>
+    <script src="__CHART_JS_SRC__"></script>
     <script>
         let charts = {};
         
+        // Show one station: /?station=<id>, else the server picks the most recently seen
+        const STATION = new URLSearchParams(location.search).get('station');
+        function apiUrl(path) {
+            return STATION ? `${path}?station=${encodeURIComponent(STATION)}` : path;
+        }
+        
         function createChart(canvasId, label, color) {
             const ctx = document.getElementById(canvasId).getContext('2d');
             return new Chart(ctx, {
@@ -283,11 +496,13 @@ DASHBOARD_HTML = """
                     scales: { 
                         y: { 
                             beginAtZero: false,
-                            grid: { color: '#e2e8f0', drawBorder: false },
+                            grid: { color: '#e2e8f0' },
+                            border: { display: false },
                             ticks: { color: '#718096', font: { size: 11 } }
                         },
                         x: { 
-                            grid: { display: false, drawBorder: false },
+                            grid: { display: false },
+                            border: { display: false },
                             ticks: { 
                                 color: '#718096',
                                 font: { size: 10 },
@@ -310,7 +525,7 @@ DASHBOARD_HTML = """
         }
         
         function updateValues() {
-            fetch('/api/data')
+            fetch(apiUrl('/api/data'))
                 .then(r => r.json())
                 .then(data => {
                     document.getElementById('temp').innerText = data.temperature.toFixed(1);
@@ -346,9 +561,43 @@ DASHBOARD_HTML = """
                 });
         }
         
+        // Decode /api/history.bin into the same shape as /api/history
+        function fetchHistory() {
+            return fetch(apiUrl('/api/history.bin'))
+                .then(r => r.arrayBuffer())
+                .then(buf => {
+                    const view = new DataView(buf);
+                    const nHist = view.getUint32(0, true);
+                    const nPred = view.getUint32(4, true);
+                    const baseTime = view.getFloat64(8, true);
+                    let offset = 16;
+                    const block = n => {
+                        const values = new Float32Array(buf, offset, n);
+                        offset += n * 4;
+                        return Array.from(values);
+                    };
+                    const label = s => new Date(baseTime + s * 1000).toTimeString().slice(0, 8);
+                    
+                    const data = {
+                        timestamps: block(nHist).map(label),
+                        temperatures: block(nHist),
+                        pressures: block(nHist),
+                        humidities: block(nHist),
+                        altitudes: block(nHist),
+                        lights: block(nHist)
+                    };
+                    data.pred_timestamps = block(nPred).map(label);
+                    data.pred_temperatures = block(nPred);
+                    data.pred_pressures = block(nPred);
+                    data.pred_humidities = block(nPred);
+                    data.pred_altitudes = block(nPred);
+                    data.is_predicting = nPred > 0;
+                    return data;
+                });
+        }
+        
         function updateCharts() {
-            fetch('/api/history')
-                .then(r => r.json())
+            fetchHistory()
                 .then(data => {
                     if (!data.is_predicting) {
                         // Before 3 minutes - show only historical data
@@ -535,15 +784,23 @@ DASHBOARD_HTML = """
 async def websocket_handler(websocket):
     client_addr = websocket.remote_address
     print(f"✅ Client connected: {client_addr}")
+    stations_seen = set()
     try:
         async for message in websocket:
             try:
                 data = json.loads(message)
-                data['received_at'] = datetime.now().isoformat()
-                data_history.append(data)
+                received_at = datetime.now()
+                data['received_at'] = received_at.isoformat()
+                
+                # Stations are identified by an optional station_id field, else by IP
+                station = str(data.get('station_id', client_addr[0]))
+                stations_seen.add(station)
+                record = station_registry.touch(station, received_at.timestamp(),
+                                                address=client_addr[0], connection=websocket)
+                record.buffer.append(data, received_at.timestamp())
                 
                 # Save to CSV
-                save_to_csv(data)
+                save_to_csv(station, data)
                 
                 print(f"📊 Temp={data['temperature']:.1f}°C, Pressure={data['pressure']:.1f}hPa, "
                       f"Humidity={data.get('humidity', 0):.1f}%, Altitude={data.get('altitude', 0):.1f}m, "
@@ -551,9 +808,13 @@ async def websocket_handler(websocket):
                 
                 await websocket.send("OK")
                 
-                # Train ML model after 3 minutes (36 readings)
-                if len(data_history) >= 36:
-                    train_model()
+                # Retrain on every reading; predictions start once WARMUP is covered.
+                # A failed fit must not skip alerting, forecast rules just see no model
+                try:
+                    train_model(station, record)
+                except Exception as e:
+                    print(f"❌ Training Error for {station}: {e}")
+                check_alerts(station, record, data, received_at.timestamp())
             except json.JSONDecodeError as e:
                 print(f"❌ JSON Error: {e}")
             except Exception as e:
@@ -562,41 +823,140 @@ async def websocket_handler(websocket):
         print(f"⚠️ Client disconnected: {client_addr}")
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
+    finally:
+        for station in stations_seen:
+            station_registry.disconnect(station, websocket)
 
-def train_model():
-    # Need at least 36 readings (3 minutes at 5 sec intervals)
-    if len(data_history) < 36:
-        return
-    
-    temps = [d['temperature'] for d in data_history]
-    pressures = [d['pressure'] for d in data_history]
-    humidities = [d.get('humidity', 50) for d in data_history]
-    altitudes = [d.get('altitude', 0) for d in data_history]
-    X = np.arange(len(temps)).reshape(-1, 1)
+async def station_sweep():
+    while True:
+        await asyncio.sleep(STATION_TICK_INTERVAL)
+        try:
+            station_registry.tick(time.time())
+        except Exception as e:
+            print(f"❌ Station Registry Error: {e}")
+
+def print_alerts(events):
+    for event in events:
+        icon = '🚨' if event['state'] == 'fired' else '✅'
+        print(f"{icon} Alert {event['rule']} {event['state']} for {event['station']}: "
+              f"{event['value']:.2f} ({event['op']} {event['threshold']})")
+
+def check_alerts(station, record, data, now):
+    forecast = None
+    if alert_engine.needs_forecast:
+        # Forecast from this station's own model
+        result = compute_forecast(record.model)
+        if result is not None:
+            target_epochs, predictions = result
+            forecast = (target_epochs, {field: predictions[:, i] for i, field in enumerate(MODEL_FIELDS)})
+    print_alerts(alert_engine.observe(station, data, now, forecast))
+
+async def alert_sweep():
+    # Silence (dropout) rules can't fire on ingest, so check them periodically
+    while True:
+        await asyncio.sleep(ALERT_SWEEP_INTERVAL)
+        try:
+            # The registry keeps last_seen for every station, including spilled ones
+            if alert_engine.min_silence is not None:
+                now = time.time()
+                idle = station_registry.idle_stations(now, alert_engine.min_silence)
+                print_alerts(alert_engine.check_silence(now, idle))
+        except Exception as e:
+            print(f"❌ Alert Error: {e}")
+
+def gap_limit(times):
+    """Longest gap (seconds) to interpolate across, scaled to the station's send interval"""
+    if len(times) < 2:
+        return MAX_GAP
+    return max(MAX_GAP, GAP_FACTOR * float(np.median(np.diff(times))))
+
+def fit_model(history):
+    """
+    Fit a model on the last TRAINING_WINDOW of a buffer's readings, regressing
+    on wall-clock time
+    Returns: (model, origin, covered) model state; model is None until
+    the resampled grid covers WARMUP (MIN_GRID_POINTS points)
+    """
+    if not len(history):
+        return NO_MODEL
     
+    items, times = history.snapshot()
+    start = int(np.searchsorted(times, times[-1] - TRAINING_WINDOW.total_seconds()))
+    times = times[start:]
     # Train model only for temp, pressure, humidity, altitude (not light)
-    ml_model.fit(X, np.column_stack([temps, pressures, humidities, altitudes]))
-    print(f"🤖 ML Model trained with {len(temps)} data points")
+    values = np.array([[d['temperature'], d['pressure'], d.get('humidity', 50), d.get('altitude', 0)]
+                       for d in items[start:]], dtype=np.float64)
+    
+    # Readings with a missing value are dropped; the hole is a gap like any other
+    valid = ~np.isnan(values).any(axis=1)
+    times, values = times[valid], values[valid]
+    if not len(times):
+        return NO_MODEL
+    
+    # Resample onto a fixed grid without bridging gaps; gaps don't count towards warm-up
+    grid, grid_values = resample(times, values, SAMPLE_INTERVAL, gap_limit(times))
+    covered = len(grid) * SAMPLE_INTERVAL
+    if len(grid) < MIN_GRID_POINTS:
+        return (None, None, covered)
+    
+    origin = times[-1]
+    model = LinearRegression()
+    model.fit((grid - origin).reshape(-1, 1), grid_values)
+    return (model, origin, covered)
+
+def train_model(station, record):
+    # Single assignment publishes model and origin together
+    record.model = fit_model(record.buffer)
+    
+    if record.model[0] is not None:
+        times = record.buffer.times()
+        gaps = find_gaps(times, gap_limit(times))
+        gap_note = f", skipped {len(gaps)} gap(s)" if gaps else ""
+        print(f"🤖 ML Model for {station} trained on {record.model[2]:.0f}s of data "
+              f"from {len(record.buffer)} readings{gap_note}")
 
-def predict_future():
+def warmup_remaining(state):
+    """Seconds of (gap-free) data still needed before predictions start"""
+    return max(0, int(WARMUP.total_seconds() - state[2]))
+
+def compute_forecast(state, horizon=PREDICTION_HORIZON):
     """
-    Predict future weather values
-    Returns: tuple of (pred_temps, pred_pressures, pred_humidities, pred_altitudes)
-    Each is a list of predicted values
+    Run a model over the prediction horizon without logging anything
+    state: a station's (model, origin, covered) model state
+    Targets are every PREDICTION_STEP on the wall-clock grid after the latest
+    reading, up to the first one at or past latest reading + horizon.
+    Returns: (target_epochs, predictions) with predictions of shape (n, 4)
+    in MODEL_FIELDS order, or None if the model isn't ready
     """
-    # Need 36 readings (3 minutes) before predicting
-    if len(data_history) < 36:
-        return ([], [], [], [])
+    # Read the tuple once so model and origin always belong together
+    model, origin, _ = state
+    if model is None:
+        return None
+    
+    # The origin is the latest reading's time
+    step = PREDICTION_STEP.total_seconds()
+    first_target = (np.floor(origin / step) + 1) * step
+    target_epochs = np.arange(first_target, origin + horizon.total_seconds() + step, step)
     
-    # Predict next 60 points (5 minutes ahead at 5 sec intervals)
-    current_len = len(data_history)
-    future_indices = np.arange(current_len, current_len + 60).reshape(-1, 1)
+    return target_epochs, model.predict((target_epochs - origin).reshape(-1, 1))
+
+def predict_future(state):
+    """
+    Predict future weather values from a station's model state
+    Returns: tuple of (pred_temps, pred_pressures, pred_humidities, pred_altitudes, target_times)
+    Each is a list of predicted values; target_times holds the wall-clock
+    datetime of each prediction, every PREDICTION_STEP up to PREDICTION_HORIZON
+    after the latest reading
+    """
+    forecast = compute_forecast(state)
+    if forecast is None:
+        return ([], [], [], [], [])
     
     # Get predictions as numpy array
-    predictions = ml_model.predict(future_indices)
+    target_epochs, predictions = forecast
     
     # Extract predictions for each variable
-    # predictions shape is (60, 4) - 60 samples, 4 features
+    # predictions shape is (n, 4) - n target times, 4 features
     pred_temps = predictions[:, 0].tolist()
     pred_pressures = predictions[:, 1].tolist()
     pred_humidities = predictions[:, 2].tolist()
@@ -604,14 +964,13 @@ def predict_future():
     
     # Store predictions with timestamp
     prediction_time = datetime.now()
-    last_data_time = datetime.fromisoformat(data_history[-1]['received_at'])
+    target_times = [datetime.fromtimestamp(t) for t in target_epochs]
     
     predictions_to_save = []
     for i in range(len(pred_temps)):
-        target_time = last_data_time + timedelta(seconds=(i + 1) * 5)
         predictions_to_save.append({
             'prediction_time': prediction_time.isoformat(),
-            'target_time': target_time.isoformat(),
+            'target_time': target_times[i].isoformat(),
             'temperature': pred_temps[i],
             'pressure': pred_pressures[i],
             'humidity': pred_humidities[i],
@@ -631,30 +990,112 @@ def predict_future():
     if len(prediction_history) > 20:
         prediction_history.pop(0)
     
-    return pred_temps, pred_pressures, pred_humidities, pred_altitudes
+    return pred_temps, pred_pressures, pred_humidities, pred_altitudes, target_times
+
+def build_asset(body, content_type):
+    """Precompress an asset once and compute its ETag"""
+    etag = hashlib.sha1(body).hexdigest()[:20]
+    asset = {
+        'content_type': content_type,
+        'etag': etag,
+        'identity': body,
+        'gzip': gzip.compress(body, compresslevel=9)
+    }
+    if brotli is not None:
+        asset['br'] = brotli.compress(body, quality=11)
+    return asset
+
+def load_static_assets():
+    assets = {}
+    if os.path.isdir(STATIC_DIR):
+        for name in os.listdir(STATIC_DIR):
+            path = os.path.join(STATIC_DIR, name)
+            if name.startswith('.') or not os.path.isfile(path):
+                continue
+            content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            if content_type.startswith('text/') or content_type.endswith('javascript'):
+                content_type += '; charset=utf-8'
+            with open(path, 'rb') as f:
+                assets[name] = build_asset(f.read(), content_type)
+    return assets
+
+def build_dashboard():
+    # The dashboard has no template variables, so it is rendered once at startup
+    # Chart.js is always served locally, versioned by its ETag
+    chart_src = f"/static/{CHART_JS_FILE}"
+    if CHART_JS_FILE in STATIC_ASSETS:
+        chart_src += f"?v={STATIC_ASSETS[CHART_JS_FILE]['etag']}"
+    html = DASHBOARD_HTML.replace('__CHART_JS_SRC__', chart_src)
+    return build_asset(html.encode('utf-8'), 'text/html; charset=utf-8')
+
+def serve_asset(asset, cache_control):
+    # Pick the best precompressed representation the client accepts
+    encoding = 'identity'
+    if 'br' in asset and request.accept_encodings['br']:
+        encoding = 'br'
+    elif request.accept_encodings['gzip']:
+        encoding = 'gzip'
+    etag = asset['etag'] if encoding == 'identity' else f"{asset['etag']}-{encoding}"
+    
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(asset[encoding], content_type=asset['content_type'])
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+STATIC_ASSETS = load_static_assets()
+DASHBOARD_ASSET = build_dashboard()
 
 @app.route('/')
 def index():
-    return render_template_string(DASHBOARD_HTML)
+    # Revalidate on every load so a restarted server's dashboard is picked up
+    return serve_asset(DASHBOARD_ASSET, 'no-cache')
+
+@app.route('/static/<filename>')
+def static_asset(filename):
+    asset = STATIC_ASSETS.get(filename)
+    if asset is None:
+        return Response(status=404)
+    # URLs carry the ETag as a version, so they can be cached for a long time
+    return serve_asset(asset, 'public, max-age=31536000, immutable')
+
+def dashboard_source():
+    """
+    Station behind the dashboard endpoints: ?station=<id>, else the most recently seen
+    Returns: (station, history, model state); history is None if there is no such station
+    """
+    station = request.args.get('station') or station_registry.latest()
+    source = station_registry.get(station) if station is not None else None
+    if source is None:
+        return station, None, NO_MODEL
+    history, state = source
+    return station, history, state or NO_MODEL
 
 @app.route('/api/data')
 def get_data():
-    if not data_history:
+    station, history, state = dashboard_source()
+    if not history:
         return json.dumps({
             'temperature': 0, 'pressure': 0, 'humidity': 0, 'altitude': 0, 'light': 0,
             'pred_temperature': 0, 'pred_pressure': 0, 'pred_humidity': 0, 
-            'pred_altitude': 0, 'is_predicting': False, 'time_remaining': 180,
+            'pred_altitude': 0, 'is_predicting': False,
+            'time_remaining': int(WARMUP.total_seconds()),
             'timestamp': 'Waiting for data...'
         })
     
-    latest = data_history[-1]
+    latest = history[-1]
     
     # FIX: Properly unpack the tuple returned by predict_future()
-    pred_temps, pred_pressures, pred_humidities, pred_altitudes = predict_future()
+    pred_temps, pred_pressures, pred_humidities, pred_altitudes, _ = predict_future(state)
     
     # Calculate time remaining until predictions start
-    time_remaining = max(0, 180 - (len(data_history) * 5))
-    is_predicting = len(data_history) >= 36
+    time_remaining = warmup_remaining(state)
+    is_predicting = len(pred_temps) > 0
     
     # Get last prediction value for display
     if is_predicting and len(pred_temps) > 0:
@@ -681,12 +1122,16 @@ def get_data():
         'is_predicting': is_predicting,
         'time_remaining': time_remaining,
         'prediction_count': len(prediction_history),
+        'station': station,
         'timestamp': latest['received_at']
     })
 
 @app.route('/api/history')
 def get_history():
-    if not data_history:
+    station, history, state = dashboard_source()
+    # The websocket thread keeps appending, read a consistent copy
+    history, _ = history.snapshot() if history is not None else ([], None)
+    if not history:
         return json.dumps({
             'timestamps': [], 'temperatures': [], 'pressures': [], 
             'humidities': [], 'altitudes': [], 'lights': [],
@@ -695,26 +1140,22 @@ def get_history():
             'pred_timestamps': [], 'is_predicting': False
         })
     
-    timestamps = [d['received_at'].split('T')[1][:8] for d in data_history]
-    temperatures = [d['temperature'] for d in data_history]
-    pressures = [d['pressure'] for d in data_history]
-    humidities = [d.get('humidity', 50) for d in data_history]
-    altitudes = [d.get('altitude', 0) for d in data_history]
-    lights = [d['light'] for d in data_history]
+    timestamps = [d['received_at'].split('T')[1][:8] for d in history]
+    temperatures = [d['temperature'] for d in history]
+    pressures = [d['pressure'] for d in history]
+    humidities = [d.get('humidity', 50) for d in history]
+    altitudes = [d.get('altitude', 0) for d in history]
+    lights = [d['light'] for d in history]
     
     # FIX: Properly unpack the tuple returned by predict_future()
-    pred_temps, pred_pressures, pred_humidities, pred_altitudes = predict_future()
+    pred_temps, pred_pressures, pred_humidities, pred_altitudes, target_times = predict_future(state)
     
-    is_predicting = len(data_history) >= 36
+    is_predicting = len(pred_temps) > 0
     
     # Generate prediction timestamps
     if is_predicting and len(pred_temps) > 0:
-        pred_timestamps = []
-        last_time = datetime.fromisoformat(data_history[-1]['received_at'])
         # Only show first 12 predictions for chart clarity
-        for i in range(min(12, len(pred_temps))):
-            future_time = last_time + timedelta(seconds=(i + 1) * 5)
-            pred_timestamps.append(future_time.strftime('%H:%M:%S'))
+        pred_timestamps = [t.strftime('%H:%M:%S') for t in target_times[:12]]
         
         # Limit predictions to 12 for display
         pred_temps = pred_temps[:12]
@@ -743,9 +1184,160 @@ def get_history():
         'is_predicting': is_predicting
     })
 
+@app.route('/api/history.bin')
+def get_history_binary():
+    """
+    Same series as /api/history as little-endian typed arrays for the dashboard:
+    uint32 n_hist, uint32 n_pred, float64 base time (epoch ms of the latest reading),
+    then Float32 blocks: n_hist x [seconds from base, temperature, pressure,
+    humidity, altitude, light] and n_pred x [seconds from base, temperature,
+    pressure, humidity, altitude]
+    """
+    station, history, state = dashboard_source()
+    # Every block must have n_hist values: build them all from one snapshot while
+    # the websocket thread keeps appending
+    items, times = history.snapshot() if history is not None else ([], None)
+    if not items:
+        return Response(struct.pack('<IId', 0, 0, 0.0), content_type='application/octet-stream')
+    
+    base_time = times[-1]
+    blocks = [
+        times - base_time,
+        [d['temperature'] for d in items],
+        [d['pressure'] for d in items],
+        [d.get('humidity', 50) for d in items],
+        [d.get('altitude', 0) for d in items],
+        [d['light'] for d in items]
+    ]
+    
+    pred_temps, pred_pressures, pred_humidities, pred_altitudes, target_times = predict_future(state)
+    
+    # Only show first 12 predictions for chart clarity, as /api/history does
+    n_pred = min(12, len(pred_temps))
+    if n_pred:
+        blocks += [
+            [t.timestamp() - base_time for t in target_times[:n_pred]],
+            pred_temps[:n_pred],
+            pred_pressures[:n_pred],
+            pred_humidities[:n_pred],
+            pred_altitudes[:n_pred]
+        ]
+    
+    body = struct.pack('<IId', len(items), n_pred, base_time * 1000)
+    body += b''.join(np.asarray(block, dtype='<f4').tobytes() for block in blocks)
+    response = Response(body, content_type='application/octet-stream')
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@app.route('/api/stations')
+def get_stations():
+    # Optional filter, e.g. /api/stations?status=stale
+    status = request.args.get('status')
+    stations = station_registry.snapshot(time.time())
+    
+    counts = {STATUS_LIVE: 0, STATUS_STALE: 0}
+    for s in stations:
+        counts[s['status']] += 1
+        s['first_seen'] = datetime.fromtimestamp(s['first_seen']).isoformat()
+        s['last_seen'] = datetime.fromtimestamp(s['last_seen']).isoformat()
+        s['idle_seconds'] = round(s['idle_seconds'], 1)
+    
+    return json.dumps({
+        'total': len(stations),
+        'live': counts[STATUS_LIVE],
+        'stale': counts[STATUS_STALE],
+        'connected': sum(1 for s in stations if s['connected']),
+        'resident': sum(1 for s in stations if s['resident']),
+        'stations': [s for s in stations if status is None or s['status'] == status]
+    })
+
+@app.route('/api/profile')
+def start_profile():
+    # e.g. /api/profile?mode=sample&seconds=30 or /api/profile?mode=cprofile&seconds=10
+    if not PROFILING_ENABLED:
+        return Response(json.dumps({'error': 'Profiling disabled, set WEATHER_PROFILING=1'}),
+                        status=403, content_type='application/json')
+    
+    mode = request.args.get('mode', 'sample')
+    try:
+        seconds = float(request.args.get('seconds', 10))
+    except ValueError:
+        seconds = np.nan
+    if not np.isfinite(seconds) or seconds <= 0:
+        return Response(json.dumps({'error': 'seconds must be a positive number'}),
+                        status=400, content_type='application/json')
+    seconds = min(seconds, MAX_PROFILE_SECONDS)
+    if mode == 'sample':
+        if not sampling_profiler.start():
+            return Response(json.dumps({'error': 'Sampling profiler already running'}),
+                            status=409, content_type='application/json')
+        Timer(seconds, stop_sampling_profiler).start()
+    elif mode == 'cprofile':
+        if ws_loop is None:
+            return Response(json.dumps({'error': 'WebSocket server not running'}),
+                            status=503, content_type='application/json')
+        if not profile_event_loop(ws_loop, seconds):
+            return Response(json.dumps({'error': 'cProfile already running'}),
+                            status=409, content_type='application/json')
+    else:
+        return Response(json.dumps({'error': f'Unknown mode {mode!r}'}),
+                        status=400, content_type='application/json')
+    
+    print(f"📈 Profiling ({mode}) for {seconds:.0f}s")
+    return json.dumps({'mode': mode, 'seconds': seconds, 'output_dir': PROFILE_DIR})
+
+def stop_sampling_profiler():
+    path = sampling_profiler.stop()
+    if path:
+        print(f"📈 Sampling profile written to {path}")
+
+def handle_profile_signal(signum, frame):
+    if signum == signal.SIGUSR1:
+        # Toggle: first signal starts sampling, the next one writes the profile
+        if not sampling_profiler.start():
+            Thread(target=stop_sampling_profiler, daemon=True).start()
+        else:
+            print("📈 Sampling profiler started, send SIGUSR1 again to stop")
+    elif ws_loop is not None:
+        if profile_event_loop(ws_loop, PROFILE_SIGNAL_SECONDS):
+            print(f"📈 cProfile running on the websocket loop for {PROFILE_SIGNAL_SECONDS}s")
+        else:
+            print("📈 cProfile already running, wait for it to finish")
+
+@app.route('/api/archive')
+def get_archive():
+    # Range query over cold data, e.g. /api/archive?start=2025-10-01T00:00&end=2025-10-02T00:00
+    start = request.args.get('start')
+    end = request.args.get('end')
+    if not start or not end:
+        return Response(json.dumps({'error': 'start and end are required'}),
+                        status=400, content_type='application/json')
+    try:
+        archive.to_epoch_ms([start, end])
+    except ValueError:
+        return Response(json.dumps({'error': 'start and end must be ISO timestamps'}),
+                        status=400, content_type='application/json')
+    
+    columns = request.args.get('columns')
+    # Cap the response; clients page by moving start past the last timestamp.
+    # One row past the cap tells whether there is more without decoding the rest
+    result = archive.read_range(start=start, end=end, columns=columns.split(',') if columns else None,
+                                limit=ARCHIVE_MAX_ROWS + 1, station=request.args.get('station'))
+    truncated = len(result['timestamp']) > ARCHIVE_MAX_ROWS
+    result = {key: values[:ARCHIVE_MAX_ROWS] for key, values in result.items()}
+    
+    # NaN (missing reading) isn't valid JSON, send null instead
+    response = {'timestamps': [str(t) for t in result.pop('timestamp')],
+                'stations': result.pop('station').tolist(), 'truncated': truncated}
+    response.update({name: [None if np.isnan(v) else v for v in values.tolist()]
+                     for name, values in result.items()})
+    return json.dumps(response)
+
 def start_websocket():
+    global ws_loop
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
+    ws_loop = loop
     
     async def main():
         async with websockets.serve(
@@ -756,7 +1348,7 @@ def start_websocket():
             ping_timeout=10
         ):
             print("✅ WebSocket server started on ws://0.0.0.0:8765")
-            await asyncio.Future()
+            await asyncio.gather(alert_sweep(), station_sweep())
     
     loop.run_until_complete(main())
 
@@ -768,11 +1360,20 @@ if __name__ == "__main__":
     print("📊 Dashboard: http://localhost:5000")
     print("💾 Data logging to: weather_data.csv")
     print("🔮 Predictions logging to: weather_predictions.csv")
+    print(f"🗄️ Archiving readings older than {ARCHIVE_AFTER} to: {archive.ARCHIVE_FILE}")
     
     # Initialize CSV file
     init_csv()
     
+    # Profiling signals (not available on Windows)
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, handle_profile_signal)
+        signal.signal(signal.SIGUSR2, handle_profile_signal)
+    
     ws_thread = Thread(target=start_websocket, daemon=True)
     ws_thread.start()
     
+    archive_thread = Thread(target=start_archiver, daemon=True)
+    archive_thread.start()
+    
     start_flask()
\ No newline at end of file
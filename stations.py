@@ -0,0 +1,251 @@
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+from threading import Lock
+from timeseries import TimeRingBuffer
+
+# Station registry: tracks every station's last reading on a timer wheel and
+# moves it live -> stale (idle timeout) -> expired (state dropped). Records
+# (with last_seen) stay in memory until expiry; only the most recently seen
+# stations also keep their reading buffer and model in memory, the rest are
+# spilled to disk and reloaded when the station reports again.
+
+STATUS_LIVE = 'live'
+STATUS_STALE = 'stale'
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel: `slots` buckets of `resolution` seconds each
+    Deadlines further out than one turn land in an earlier bucket and are
+    simply rescheduled when it fires, so scheduling is always O(1).
+    """
+
+    def __init__(self, now, slots=512, resolution=1.0):
+        self.buckets = [[] for _ in range(slots)]
+        self.resolution = resolution
+        self.current = int(now // resolution)
+
+    def schedule(self, key, token, deadline):
+        tick = max(int(deadline // self.resolution), self.current + 1)
+        self.buckets[tick % len(self.buckets)].append((key, token))
+
+    def advance(self, now):
+        """Return the (key, token) entries of every bucket passed since the last call"""
+        target = int(now // self.resolution)
+        # After a long stall one full turn covers every bucket
+        first = max(self.current + 1, target - len(self.buckets) + 1)
+        due = []
+        for tick in range(first, target + 1):
+            bucket = self.buckets[tick % len(self.buckets)]
+            due.extend(bucket)
+            bucket.clear()
+        self.current = max(self.current, target)
+        return due
+
+
+class StationRecord:
+    def __init__(self, station, now):
+        self.station = station
+        self.address = None
+        self.first_seen = now
+        self.last_seen = now
+        self.readings = 0
+        self.status = STATUS_LIVE
+        self.connections = set()
+        self.buffer = None  # TimeRingBuffer while resident, None while spilled
+        self.model = None  # Station's model state, set by the server; spilled with the buffer
+        self.spilled = False
+        self.timer_token = 0
+
+
+class StationRegistry:
+    def __init__(self, idle_timeout, expire_after, max_resident, spill_dir, buffer_size,
+                 on_spill=None, on_restore=None, on_idle=None, on_expire=None, now=0.0):
+        """
+        idle_timeout: seconds without a reading before a station is stale
+        expire_after: seconds without a reading before its state is dropped
+        max_resident: stations whose buffers and models are kept in memory (LRU)
+        on_spill(station) -> extra state to persist alongside the buffer
+        on_restore(station, extra), on_idle(record), on_expire(station): hooks
+        """
+        self.idle_timeout = idle_timeout
+        self.expire_after = expire_after
+        self.max_resident = max_resident
+        self.spill_dir = spill_dir
+        self.buffer_size = buffer_size
+        self.on_spill = on_spill
+        self.on_restore = on_restore
+        self.on_idle = on_idle
+        self.on_expire = on_expire
+
+        self.records = {}
+        self.resident = OrderedDict()  # station -> record, least recently seen first
+        self.wheel = TimerWheel(now)
+        self.lock = Lock()
+        self._clear_spill_dir()
+
+    def _clear_spill_dir(self):
+        # Records only live in memory, so files spilled by a previous run are orphans
+        if not os.path.isdir(self.spill_dir):
+            return
+        for name in os.listdir(self.spill_dir):
+            if name.endswith(('.pkl', '.tmp')):
+                os.remove(os.path.join(self.spill_dir, name))
+
+    def _spill_path(self, station):
+        name = hashlib.sha1(station.encode('utf-8')).hexdigest()
+        return os.path.join(self.spill_dir, f"{name}.pkl")
+
+    def _schedule(self, record, deadline):
+        record.timer_token += 1
+        self.wheel.schedule(record.station, record.timer_token, deadline)
+
+    def _spill(self, record):
+        extra = self.on_spill(record.station) if self.on_spill else None
+        path = self._spill_path(record.station)
+        tmp_path = path + '.tmp'
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((record.buffer, record.model, extra), f, protocol=pickle.HIGHEST_PROTOCOL)
+            # A spill file is either complete or absent, never truncated
+            os.replace(tmp_path, path)
+        except Exception:
+            # Nothing was spilled: hand the extra state back, the record keeps its buffer
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            if self.on_restore:
+                self.on_restore(record.station, extra)
+            raise
+        record.buffer = None
+        record.model = None
+        record.spilled = True
+
+    def _load(self, record):
+        with open(self._spill_path(record.station), 'rb') as f:
+            return pickle.load(f)
+
+    def _restore(self, record):
+        record.buffer, record.model, extra = self._load(record)
+        os.remove(self._spill_path(record.station))
+        record.spilled = False
+        if self.on_restore:
+            self.on_restore(record.station, extra)
+
+    def touch(self, station, now, address=None, connection=None):
+        """
+        Record a reading from a station, reloading its state if it was spilled
+        Returns: the station's record (record.buffer is resident)
+        """
+        with self.lock:
+            record = self.records.get(station)
+            if record is None:
+                record = self.records[station] = StationRecord(station, now)
+                record.buffer = TimeRingBuffer(maxlen=self.buffer_size)
+                self._schedule(record, now + self.idle_timeout)
+            elif record.status != STATUS_LIVE:
+                record.status = STATUS_LIVE
+                self._schedule(record, now + self.idle_timeout)
+
+            record.last_seen = now
+            record.readings += 1
+            if address is not None:
+                record.address = address
+            if connection is not None:
+                record.connections.add(connection)
+
+            if record.spilled:
+                self._restore(record)
+            self.resident[station] = record
+            self.resident.move_to_end(station)
+            while len(self.resident) > self.max_resident:
+                _, oldest = self.resident.popitem(last=False)
+                self._spill(oldest)
+            return record
+
+    def get(self, station):
+        """
+        Read a station's (buffer, model) without changing its LRU position
+        Spilled stations are read from disk but stay spilled.
+        Returns: (buffer, model), or None for an unknown station
+        """
+        with self.lock:
+            record = self.records.get(station)
+            if record is None:
+                return None
+            if record.spilled:
+                buffer, model, _ = self._load(record)
+                return buffer, model
+            return record.buffer, record.model
+
+    def latest(self):
+        """The most recently seen station, or None"""
+        with self.lock:
+            return next(reversed(self.resident), None)
+
+    def idle_stations(self, now, min_idle):
+        """(station, last_seen) of every station silent for at least min_idle seconds"""
+        with self.lock:
+            cutoff = now - min_idle
+            return [(r.station, r.last_seen) for r in self.records.values() if r.last_seen <= cutoff]
+
+    def disconnect(self, station, connection):
+        with self.lock:
+            record = self.records.get(station)
+            if record is not None:
+                record.connections.discard(connection)
+
+    def tick(self, now):
+        """Advance the timer wheel, marking idle stations stale and expiring gone ones"""
+        idle, expired = [], []
+        with self.lock:
+            for station, token in self.wheel.advance(now):
+                record = self.records.get(station)
+                if record is None or record.timer_token != token:
+                    continue  # Expired or rescheduled since
+
+                if record.status == STATUS_LIVE:
+                    deadline = record.last_seen + self.idle_timeout
+                    if now >= deadline:
+                        record.status = STATUS_STALE
+                        idle.append(record)
+                        deadline = record.last_seen + self.expire_after
+                    self._schedule(record, deadline)
+                elif now >= record.last_seen + self.expire_after:
+                    self._expire(record)
+                    expired.append(station)
+                else:
+                    self._schedule(record, record.last_seen + self.expire_after)
+
+        # Hooks run outside the lock, they may call back into the registry
+        for record in idle:
+            if self.on_idle:
+                self.on_idle(record)
+        for station in expired:
+            if self.on_expire:
+                self.on_expire(station)
+        return idle, expired
+
+    def _expire(self, record):
+        del self.records[record.station]
+        self.resident.pop(record.station, None)
+        if record.spilled and os.path.exists(self._spill_path(record.station)):
+            os.remove(self._spill_path(record.station))
+
+    def snapshot(self, now):
+        """Status of every known station, most recently seen first"""
+        with self.lock:
+            records = sorted(self.records.values(), key=lambda r: r.last_seen, reverse=True)
+            return [{
+                'station': r.station,
+                'address': r.address,
+                'status': r.status,
+                'connected': bool(r.connections),
+                'first_seen': r.first_seen,
+                'last_seen': r.last_seen,
+                'idle_seconds': now - r.last_seen,
+                'readings': r.readings,
+                'resident': not r.spilled
+            } for r in records]
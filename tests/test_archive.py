@@ -0,0 +1,163 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import archive
+
+T0 = 1760000000000  # epoch ms
+
+
+def make_columns(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        'temperature': 20 + rng.normal(0, 0.5, n).round(2),
+        'pressure': 1013 + rng.normal(0, 0.2, n).round(2),
+        'humidity': 50 + rng.normal(0, 1, n).round(2),
+        'altitude': np.full(n, 120.0),
+        'light': rng.uniform(0, 100, n).round(2),
+    }
+
+
+def as_time(ms):
+    return np.datetime64(int(ms), 'ms')
+
+
+def roundtrip(ts_ms, columns, station=''):
+    blob = archive.encode_chunk(ts_ms, columns, station)
+    _, rows, t_min, _, station_len, length = archive.CHUNK_HEADER.unpack_from(blob)
+    offset = archive.CHUNK_HEADER.size + station_len
+    assert blob[archive.CHUNK_HEADER.size:offset].decode('utf-8') == station
+    assert length == len(blob) - offset
+    return archive.decode_chunk(blob[offset:], rows, t_min)
+
+
+@pytest.fixture
+def archive_path(tmp_path):
+    return str(tmp_path / 'archive.bin')
+
+
+def test_roundtrip_quantised():
+    ts_ms = T0 + np.arange(100, dtype=np.int64) * 5000
+    columns = make_columns(100)
+    result = roundtrip(ts_ms, columns)
+    assert np.array_equal(result['timestamp'].astype(np.int64), ts_ms)
+    for name, values in columns.items():
+        np.testing.assert_allclose(result[name], values, atol=0.5 / archive.COLUMN_SCALES[name])
+
+
+def test_roundtrip_irregular_timestamps():
+    ts_ms = T0 + np.cumsum(np.array([0, 5000, 4999, 5003, 60000, 5000, 1], dtype=np.int64))
+    result = roundtrip(ts_ms, make_columns(len(ts_ms)))
+    assert np.array_equal(result['timestamp'].astype(np.int64), ts_ms)
+
+
+def test_single_row():
+    ts_ms = np.array([T0], dtype=np.int64)
+    columns = make_columns(1)
+    result = roundtrip(ts_ms, columns, station='station-é')
+    assert result['timestamp'].astype(np.int64).tolist() == [T0]
+    for name, values in columns.items():
+        np.testing.assert_allclose(result[name], values, atol=0.01)
+
+
+def test_missing_and_non_finite_values_are_exact():
+    ts_ms = T0 + np.arange(5, dtype=np.int64) * 5000
+    columns = make_columns(5)
+    columns['temperature'][1] = np.nan
+    columns['pressure'][2] = np.inf
+    columns['humidity'][3] = 1e17
+    columns['light'][:] = np.nan
+    result = roundtrip(ts_ms, columns)
+    for name in ('temperature', 'pressure', 'humidity', 'light'):
+        assert np.array_equal(result[name], columns[name], equal_nan=True)
+
+
+def test_header_bounds_ignore_missing_values():
+    ts_ms = T0 + np.arange(3, dtype=np.int64) * 5000
+    columns = make_columns(3)
+    columns['temperature'] = np.array([np.nan, 1.5, -2.0])
+    columns['light'][:] = np.nan
+    blob = archive.encode_chunk(ts_ms, columns)
+
+    offset = archive.CHUNK_HEADER.size  # empty station id
+    _, length = archive.TIME_HEADER.unpack_from(blob, offset)
+    offset += archive.TIME_HEADER.size + length
+    bounds = {}
+    for name in archive.ARCHIVE_COLUMNS:
+        lo, hi, _, _, _, length = archive.COLUMN_HEADER.unpack_from(blob, offset)
+        bounds[name] = (lo, hi)
+        offset += archive.COLUMN_HEADER.size + length
+    assert bounds['temperature'] == (-2.0, 1.5)
+    assert all(np.isnan(bounds['light']))
+
+
+def test_multiple_chunks(archive_path):
+    n = archive.CHUNK_ROWS * 2 + 7
+    ts_ms = T0 + np.arange(n, dtype=np.int64) * 5000
+    columns = make_columns(n)
+    assert archive.append_chunks(ts_ms, columns, path=archive_path) == 3
+
+    with open(archive_path, 'rb') as f:
+        assert [h[0] for h in archive.iter_headers(f)] == [archive.CHUNK_ROWS, archive.CHUNK_ROWS, 7]
+    result = archive.read_range(path=archive_path)
+    assert np.array_equal(result['timestamp'].astype(np.int64), ts_ms)
+    np.testing.assert_allclose(result['light'], columns['light'], atol=0.005)
+
+
+def test_range_edges_are_inclusive(archive_path):
+    n = archive.CHUNK_ROWS * 2
+    ts_ms = T0 + np.arange(n, dtype=np.int64) * 5000
+    archive.append_chunks(ts_ms, make_columns(n), path=archive_path)
+
+    # Exactly the last row of the first chunk and the first row of the second
+    edge = archive.CHUNK_ROWS - 1
+    result = archive.read_range(as_time(ts_ms[edge]), as_time(ts_ms[edge + 1]), path=archive_path)
+    assert result['timestamp'].astype(np.int64).tolist() == ts_ms[edge:edge + 2].tolist()
+
+    # Between two readings, before and after the archive
+    assert len(archive.read_range(as_time(ts_ms[3] + 1), as_time(ts_ms[4] - 1),
+                                  path=archive_path)['timestamp']) == 0
+    assert len(archive.read_range(end=as_time(T0 - 1), path=archive_path)['timestamp']) == 0
+    assert len(archive.read_range(start=as_time(ts_ms[-1] + 1), path=archive_path)['timestamp']) == 0
+
+
+def test_read_range_limit(archive_path):
+    n = archive.CHUNK_ROWS * 3
+    ts_ms = T0 + np.arange(n, dtype=np.int64) * 5000
+    archive.append_chunks(ts_ms, make_columns(n), path=archive_path)
+
+    result = archive.read_range(start=as_time(ts_ms[10]), path=archive_path,
+                                columns=['temperature'], limit=archive.CHUNK_ROWS)
+    assert set(result) == {'timestamp', 'station', 'temperature'}
+    assert result['timestamp'].astype(np.int64).tolist() == ts_ms[10:10 + archive.CHUNK_ROWS].tolist()
+
+
+def test_stations(archive_path):
+    n = archive.CHUNK_ROWS * 2 + 10
+    ts_ms = T0 + np.arange(n, dtype=np.int64) * 1000
+    stations = np.where(np.arange(n) % 2, 'north', 'south')
+    columns = make_columns(n)
+    # Per station: one full chunk and one with the rest
+    assert archive.append_chunks(ts_ms, columns, path=archive_path, stations=stations) == 4
+
+    result = archive.read_range(path=archive_path)
+    assert np.array_equal(result['timestamp'].astype(np.int64), ts_ms)
+    assert result['station'].tolist() == stations.tolist()
+
+    north = archive.read_range(path=archive_path, station='north')
+    assert set(north['station']) == {'north'}
+    assert np.array_equal(north['timestamp'].astype(np.int64), ts_ms[1::2])
+    np.testing.assert_allclose(north['light'], columns['light'][1::2], atol=0.005)
+
+    # The limit applies across stations whose chunks overlap in time
+    first = archive.read_range(path=archive_path, limit=25)
+    assert np.array_equal(first['timestamp'].astype(np.int64), ts_ms[:25])
+    assert first['station'].tolist() == stations[:25].tolist()
+
+
+def test_missing_archive(archive_path):
+    result = archive.read_range(path=archive_path)
+    assert all(len(values) == 0 for values in result.values())
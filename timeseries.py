@@ -0,0 +1,130 @@
+from collections import deque
+from itertools import islice
+from threading import Lock
+import numpy as np
+
+# Time-indexed helpers for the model pipeline. Readings are keyed by their
+# wall-clock arrival time (epoch seconds) instead of their position, so
+# reconnects, dropped frames or a changed send interval don't skew the fit.
+
+
+class TimeRingBuffer:
+    """
+    Fixed-size buffer of readings with their epoch-second timestamps
+    Behaves like the deque it replaces (len, iteration, indexing) and adds
+    binary search by time. Timestamps must be appended in non-decreasing order.
+    Readers on other threads than the appender must use snapshot().
+    """
+
+    def __init__(self, maxlen):
+        self.maxlen = maxlen
+        self._items = deque(maxlen=maxlen)
+        self._times = np.empty(maxlen)
+        self._start = 0
+        self._lock = Lock()
+
+    def __getstate__(self):
+        # Locks can't be pickled (buffers are spilled to disk)
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def append(self, item, timestamp):
+        with self._lock:
+            size = len(self._items)
+            if size < self.maxlen:
+                self._times[(self._start + size) % self.maxlen] = timestamp
+            else:
+                # Overwrite the oldest slot
+                self._times[self._start] = timestamp
+                self._start = (self._start + 1) % self.maxlen
+            self._items.append(item)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._start = 0
+
+    def snapshot(self):
+        """(items, times) copied together, so both have the same length and order"""
+        with self._lock:
+            return list(self._items), self._ordered_times()
+
+    def times(self):
+        """Timestamps in order, oldest first (a copy)"""
+        with self._lock:
+            return self._ordered_times()
+
+    def _ordered_times(self):
+        end = self._start + len(self._items)
+        if end <= self.maxlen:
+            return self._times[self._start:end].copy()
+        return np.concatenate([self._times[self._start:], self._times[:end - self.maxlen]])
+
+    def bisect(self, timestamp, side='left'):
+        """Position of timestamp among the readings, as np.searchsorted would give"""
+        end = self._start + len(self._items)
+        if end <= self.maxlen:
+            return int(np.searchsorted(self._times[self._start:end], timestamp, side))
+
+        # The ring wraps: search the older segment, then the newer one
+        head = self._times[self._start:]
+        tail = self._times[:end - self.maxlen]
+        if timestamp < head[-1] or (side == 'left' and timestamp == head[-1]):
+            return int(np.searchsorted(head, timestamp, side))
+        return len(head) + int(np.searchsorted(tail, timestamp, side))
+
+    def between(self, start, end):
+        """Readings with start <= timestamp <= end"""
+        return list(islice(self._items, self.bisect(start), self.bisect(end, 'right')))
+
+
+def find_gaps(times, max_gap):
+    """
+    Find gaps between consecutive readings longer than max_gap seconds
+    Returns: list of (gap_start, gap_end) timestamp pairs
+    """
+    times = np.asarray(times, dtype=np.float64)
+    idx = np.flatnonzero(np.diff(times) > max_gap)
+    return list(zip(times[idx].tolist(), times[idx + 1].tolist()))
+
+
+def resample(times, values, interval, max_gap):
+    """
+    Interpolate irregular readings onto a fixed wall-clock grid
+    times: epoch seconds, ascending
+    values: array of shape (n, k)
+    Grid points are multiples of interval; points that fall inside a gap longer
+    than max_gap are dropped rather than interpolated across.
+    Returns: (grid_times, grid_values) with grid_values of shape (m, k)
+    """
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64).reshape(len(times), -1)
+    if len(times) == 0:
+        return np.empty(0), np.empty((0, values.shape[1]))
+
+    first = np.ceil(times[0] / interval) * interval
+    grid = np.arange(first, times[-1] + interval / 2, interval)
+    grid = grid[grid <= times[-1]]
+
+    # Readings either side of each grid point; keep points whose bracket is short
+    after = np.clip(np.searchsorted(times, grid, side='left'), 0, len(times) - 1)
+    before = np.clip(np.searchsorted(times, grid, side='right') - 1, 0, len(times) - 1)
+    grid = grid[times[after] - times[before] <= max_gap]
+
+    grid_values = np.column_stack([np.interp(grid, times, values[:, k])
+                                   for k in range(values.shape[1])])
+    return grid, grid_values.reshape(len(grid), values.shape[1])